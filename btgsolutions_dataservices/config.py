@@ -115,6 +115,10 @@ market_data_socket_urls = {
     },
 }
 
+ws_default_headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.54 Safari/537.36",
+}
+
 hfn_socket_urls = {
     BR: {
         REALTIME: f'wss://dataservices.btgpactualsolutions.com/stream/v2/hfn/{BR}',
@@ -0,0 +1,27 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """
+    Parses a JSON document from str or bytes. Uses orjson when it is installed, stdlib json otherwise.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(data) -> str:
+    """
+    Serializes data to a JSON string. Uses orjson when it is installed, stdlib json otherwise.
+    Meant for library-built framing (lists of tickers and plain strings): orjson writes NaN and inf as null, so user payloads go through json.dumps.
+    Values orjson cannot serialize (e.g. integers over 64 bits) fall back to json.dumps.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(data)
@@ -8,7 +8,11 @@ from ..exceptions import BadResponse
 class Authenticator:
     def __init__(self, api_key) -> None:
         self.api_key = api_key
+        self.__refresh_token()
+
+    def __refresh_token(self):
         self._token = self.get_new_token()
+        self._exp = jwt.decode(self._token, options={"verify_signature": False}).get("exp")
 
     def get_new_token(self):
         url = f"{url_apis}/authenticate"
@@ -32,11 +36,8 @@ class Authenticator:
     
     @property
     def token(self):
-        token_decoded = jwt.decode(self._token, options={"verify_signature": False})
-        exp = token_decoded.get("exp")
-        
-        if int(time.time()) >= exp:
-            self._token = self.get_new_token()
+        if int(time.time()) >= self._exp:
+            self.__refresh_token()
         
         return self._token
     
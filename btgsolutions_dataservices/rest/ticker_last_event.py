@@ -1,10 +1,23 @@
-from typing import Optional
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from ..exceptions import BadResponse
 import requests
 from ..config import url_api_v1
 from .authenticator import Authenticator
+from .. import fast_json
 import pandas as pd
-import json
+import pyarrow as pa
+
+def _records_to_dataframe(records, dtype_backend=None):
+    """
+    Builds a dataframe from a list of records. Columns are the union of the keys of all records.
+    With dtype_backend='pyarrow', each column is built once as an Arrow array and returned with pd.ArrowDtype dtypes.
+    """
+    if dtype_backend is None:
+        return pd.DataFrame(records)
+    columns = dict.fromkeys(key for record in records for key in record)
+    table = pa.table({key: [record.get(key) for record in records] for key in columns})
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
 
 class TickerLastEvent:
     """
@@ -22,12 +35,28 @@ class TickerLastEvent:
     >>>     raw_data = False
     >>> )
 
+    >>> last_event.get_trades(
+    >>>     data_type = 'equities',
+    >>>     ticker = 'PETR4',
+    >>>     dtype_backend = 'pyarrow'
+    >>> )
+
+    >>> last_event.get_trades_many(
+    >>>     data_type = 'equities',
+    >>>     tickers = ['PETR4', 'VALE3'],
+    >>>     raw_data = False
+    >>> )
+
     Parameters
     ----------------
     api_key: str
         User identification key.
         Field is required.
     """
+    available_data_types = frozenset(['equities', 'derivatives'])
+    available_dtype_backends = frozenset(['pyarrow'])
+    max_connections = 16
+
     def __init__(
         self,
         api_key:Optional[str]
@@ -36,9 +65,11 @@ class TickerLastEvent:
         self.token = Authenticator(self.api_key).token
         self.headers = {"authorization": f"authorization {self.token}"}
 
-        self.available_data_types = ['equities', 'derivatives']
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=self.max_connections))
 
-    def get_trades(self, data_type:str, ticker:str, raw_data:bool=False):
+    def get_trades(self, data_type:str, ticker:str, raw_data:bool=False, dtype_backend:Optional[str]=None):
 
         """
         This method provides the last market data event available, for the provided ticker.
@@ -55,22 +86,60 @@ class TickerLastEvent:
         raw_data: bool
             If false, returns data in a dataframe. If true, returns raw data.
             Field is not required. Default: False.
+        dtype_backend: str
+            Dataframe dtype backend. If 'pyarrow', columns use pyarrow-backed dtypes. If None, pandas default dtypes are used.
+            Field is not required. Default: None.
         """
         if data_type not in self.available_data_types:
-            raise Exception("Must provide a valid data_type. Valid data types are: {self.available_data_types}")
+            raise Exception(f"Must provide a valid data_type. Valid data types are: {sorted(self.available_data_types)}")
+        if dtype_backend is not None and dtype_backend not in self.available_dtype_backends:
+            raise Exception(f"Must provide a valid dtype_backend. Valid dtype backends are: {sorted(self.available_dtype_backends)}")
 
         url = f"{url_api_v1}/marketdata/last-event/trades/{data_type}?ticker={ticker}"
 
-        response = requests.request("GET", url,  headers=self.headers)
+        response = self._session.get(url)
         if response.status_code == 200:
             if raw_data:
-                return response.json()
+                return fast_json.loads(response.content)
             else:
-                return pd.DataFrame([response.json()])
+                return _records_to_dataframe([fast_json.loads(response.content)], dtype_backend)
         else:
-            response = json.loads(response.text)
+            response = fast_json.loads(response.content) if response.content else {}
             raise BadResponse(f'Error: {response.get("error", "")}')
 
+    def get_trades_many(self, data_type:str, tickers:List[str], raw_data:bool=False, max_workers:int=16, dtype_backend:Optional[str]=None):
+
+        """
+        This method provides the last market data event available, for each of the provided tickers. Requests are issued concurrently.
+
+        Parameters
+        ----------------
+        data_type: str
+            Market Data Type.
+            Field is required. 
+            Example: 'equities', 'derivatives'.
+        tickers: List[str]
+            List of ticker symbols.
+            Field is required. Example: ['PETR4', 'VALE3'].
+        raw_data: bool
+            If false, returns data in a single dataframe. If true, returns a list of raw data, in the same order as tickers.
+            Field is not required. Default: False.
+        max_workers: int
+            Maximum number of concurrent requests. Capped at max_connections (16), the size of the session's connection pool.
+            Field is not required. Default: 16.
+        dtype_backend: str
+            Dataframe dtype backend. If 'pyarrow', columns use pyarrow-backed dtypes. If None, pandas default dtypes are used.
+            Field is not required. Default: None.
+        """
+        if dtype_backend is not None and dtype_backend not in self.available_dtype_backends:
+            raise Exception(f"Must provide a valid dtype_backend. Valid dtype backends are: {sorted(self.available_dtype_backends)}")
+
+        max_workers = min(max_workers, self.max_connections)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda ticker: self.get_trades(data_type, ticker, raw_data=True), tickers))
+
+        return results if raw_data else _records_to_dataframe(results, dtype_backend)
+
     def get_available_tickers(self, data_type:str):
 
         """
@@ -86,9 +155,9 @@ class TickerLastEvent:
 
         url = f"{url_api_v1}/marketdata/last-event/trades/{data_type}/available-tickers"
 
-        response = requests.request("GET", url,  headers=self.headers)
+        response = self._session.get(url)
         if response.status_code == 200:
-            return response.json()
+            return fast_json.loads(response.content)
         else:
-            response = json.loads(response.text)
+            response = fast_json.loads(response.content) if response.content else {}
             raise BadResponse(f'Error: {response.get("error", "")}')
\ No newline at end of file
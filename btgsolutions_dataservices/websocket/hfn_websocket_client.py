@@ -2,13 +2,17 @@
 from typing import Optional, List
 from ..exceptions import WSTypeError, DelayedError, FeedError
 from ..rest import Authenticator
-from ..config import hfn_socket_urls, MAX_WS_RECONNECT_RETRIES, VALID_STREAM_TYPES, VALID_COUNTRIES, REALTIME, BR
+from ..config import hfn_socket_urls, ws_default_headers, MAX_WS_RECONNECT_RETRIES, VALID_STREAM_TYPES, VALID_COUNTRIES, REALTIME, BR
+from .. import fast_json
 from .websocket_default_functions import _on_open, _on_message, _on_error, _on_close
+from .ssl_options import get_sslopt
 import websocket 
 import json
-import ssl
+import logging
 import threading
 
+logger = logging.getLogger(__name__)
+
 class HFNWebSocketClient:
     """
     This class connects with BTG Solutions Data Services HFN WebSocket, receiving high frequency news in realtime or delayed feeds.
@@ -58,6 +62,7 @@ class HFNWebSocketClient:
         self.ssl = ssl
 
         self.__authenticator = Authenticator(self.api_key)
+        self.__headers = {**ws_default_headers, "Sec-WebSocket-Protocol": None}
         self.__nro_reconnect_retries = 0
 
         if stream_type not in VALID_STREAM_TYPES:
@@ -125,7 +130,10 @@ class HFNWebSocketClient:
         if on_close is None:
             on_close = _on_close
 
+        connected = threading.Event()
+
         def intermediary_on_open(ws):
+            connected.set()
             on_open()
             self.__nro_reconnect_retries = 0
 
@@ -137,50 +145,55 @@ class HFNWebSocketClient:
 
         def intermediary_on_close(ws, close_status_code, close_msg):
             on_close(close_status_code, close_msg)
-            
-            if reconnect:
+
+        def run_forever_with_reconnect():
+            while True:
+                self.ws.run_forever(**ssl_conf)
+
+                if not reconnect or self.__closed:
+                    return
                 if self.__nro_reconnect_retries == MAX_WS_RECONNECT_RETRIES:
                     print(f"### Fail retriyng reconnect")
                     return
                 self.__nro_reconnect_retries +=1
                 print(f"### Reconnecting.... Attempts: {self.__nro_reconnect_retries}/{MAX_WS_RECONNECT_RETRIES}")
-                self.run(on_open, on_message, on_error, on_close, reconnect)
+                self.__headers["Sec-WebSocket-Protocol"] = self.__authenticator.token
 
+        self.__headers["Sec-WebSocket-Protocol"] = self.__authenticator.token
         self.ws = websocket.WebSocketApp(
             url=self.url,
             on_open=intermediary_on_open,
             on_message=intermediary_on_message,
             on_error=intermediary_on_error,
             on_close=intermediary_on_close,
-            header={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.54 Safari/537.36",
-                "Sec-WebSocket-Protocol": self.__authenticator.token,
-            }
+            header=self.__headers
         )
 
-        ssl_conf = {} if self.ssl else {"sslopt": {"cert_reqs": ssl.CERT_NONE}}
-        wst = threading.Thread(target=self.ws.run_forever, kwargs=ssl_conf)
+        ssl_conf = {"sslopt": get_sslopt(self.ssl)}
+        self.__closed = False
+        wst = threading.Thread(target=run_forever_with_reconnect)
         wst.daemon = True
         wst.start()
 
-        while True:
-            if self.ws.sock is not None and self.ws.sock.connected:
-                break
-            pass
+        # The runner thread gives up after MAX_WS_RECONNECT_RETRIES (or at once without reconnect): don't wait on it forever
+        while not connected.wait(0.1):
+            if not wst.is_alive() and not connected.is_set():
+                raise FeedError("Could not connect to the websocket. Check your api_key and network connection.")
 
     def __send(self, data):
         """
         Class method to be used internally. Sends data to websocket.
         """
         if not isinstance(data, str):
-            data = json.dumps(data)   
-        print(f'Sending data: {data}')
+            data = json.dumps(data)
+        logger.debug('Sending data: %s', data)
         return self.ws.send(data)
     
     def close(self):
         """
         Closes connection with websocket.
         """
+        self.__closed = True
         self.ws.close()
         
     def get_latest_news(self):
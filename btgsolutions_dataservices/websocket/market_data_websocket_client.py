@@ -1,14 +1,19 @@
 
-from typing import Optional, List
+from typing import Optional, List, Union
 from ..exceptions import WSTypeError, DelayedError, FeedError
 from ..rest import Authenticator
-from ..config import market_data_socket_urls, MAX_WS_RECONNECT_RETRIES, VALID_STREAM_TYPES, VALID_EXCHANGES, VALID_MARKET_DATA_TYPES, VALID_MARKET_DATA_SUBTYPES, REALTIME, B3, TRADES, INDICES, ALL, STOCKS, BOOKS
+from ..config import market_data_socket_urls, ws_default_headers, MAX_WS_RECONNECT_RETRIES, VALID_STREAM_TYPES, VALID_EXCHANGES, VALID_MARKET_DATA_TYPES, VALID_MARKET_DATA_SUBTYPES, REALTIME, B3, TRADES, INDICES, ALL, STOCKS, BOOKS
+from .. import fast_json
 from .websocket_default_functions import _on_open, _on_message, _on_error, _on_close
+from .ssl_options import get_sslopt
 import websocket
 import json
-import ssl
+import logging
+import queue
 import threading
 
+logger = logging.getLogger(__name__)
+
 
 class MarketDataWebSocketClient:
     """
@@ -64,8 +69,29 @@ class MarketDataWebSocketClient:
     ssl: bool
         Enable or disable ssl configuration.
         Field is not required. Default: True (enable).
+
+    binary_frames: bool
+        Send control messages (subscribe, unsubscribe, ...) as binary frames instead of text frames.
+        Only enable it if the server accepts binary frames.
+        Field is not required. Default: False.
+
+    skip_utf8_validation: bool
+        Skip the UTF-8 validation of incoming text frames, which websocket-client otherwise runs over every message.
+        When enabled, on_message receives the raw message bytes instead of str.
+        Field is not required. Default: False.
     """
 
+    # Pre-serialized framing for the most frequent control messages, only the instrument list is encoded per call.
+    _SUBSCRIBE_PREFIX = '{"action": "subscribe", "params": '
+    _SUBSCRIBE_BOOKS_PREFIX = '{"action": "subscribe", "params": {"tickers": '
+    _SUBSCRIBE_BOOKS_N = ', "n": '
+    _SUBSCRIBE_BOOKS_SUFFIX = '}}'
+    _UNSUBSCRIBE_PREFIX = '{"action": "unsubscribe", "params": '
+    _CANDLE_TYPE = ', "type": '
+    _SUFFIX = '}'
+    _SUBSCRIBED_TO_MSG = fast_json.dumps({'action': 'subscribed_to'})
+    _AVAILABLE_TO_SUBSCRIBE_MSG = fast_json.dumps({'action': 'available_to_subscribe'})
+
     def __init__(
         self,
         api_key: str,
@@ -75,18 +101,23 @@ class MarketDataWebSocketClient:
         data_subtype: Optional[str] = None,
         instruments: Optional[List[str]] = [],
         ssl: Optional[bool] = True,
+        binary_frames: Optional[bool] = False,
+        skip_utf8_validation: Optional[bool] = False,
         **kwargs,
     ):
         self.api_key = api_key
         self.instruments = instruments
         self.data_type = data_type
         self.ssl = ssl
+        self.binary_frames = binary_frames
+        self.skip_utf8_validation = skip_utf8_validation
 
         self.__authenticator = Authenticator(self.api_key)
+        self.__headers = {**ws_default_headers, "Sec-WebSocket-Protocol": None}
         self.__nro_reconnect_retries = 0
 
         if data_subtype is None:
-            if exchange is B3 and data_type is not INDICES:
+            if exchange == B3 and data_type != INDICES:
                 data_subtype = STOCKS
             else:
                 data_subtype = ALL
@@ -97,9 +128,6 @@ class MarketDataWebSocketClient:
         if exchange not in VALID_EXCHANGES:
             raise FeedError(
                 f"Must provide a valid 'exchange' parameter. Valid options are: {VALID_EXCHANGES}")
-        if exchange not in VALID_EXCHANGES:
-            raise FeedError(
-                f"Must provide a valid 'exchange' parameter. Valid options are: {VALID_EXCHANGES}")
         if data_type not in VALID_MARKET_DATA_TYPES:
             raise FeedError(
                 f"Must provide a valid 'data_type' parameter. Valid options are: {VALID_MARKET_DATA_TYPES}")
@@ -160,7 +188,8 @@ class MarketDataWebSocketClient:
             Field is not required.
             Default: True.
         spawn_thread: bool
-            Spawn a new thread for incoming server messages (on_message callback function)
+            Run the on_message callback function on a dedicated worker thread, fed by a queue of incoming server messages.
+            Messages are handled one at a time, in arrival order.
             Field is not required.
             Default: True.
         """
@@ -173,7 +202,10 @@ class MarketDataWebSocketClient:
         if on_close is None:
             on_close = _on_close
 
+        connected = threading.Event()
+
         def intermediary_on_open(ws):
+            connected.set()
             on_open()
             if self.instruments:
                 self.subscribe(self.instruments)
@@ -182,10 +214,22 @@ class MarketDataWebSocketClient:
         def intermediary_on_message(ws, data):
             on_message(data)
 
+        messages = queue.Queue()
+        # Queued by the runner thread when it exits (close(), reconnects exhausted or never connected) to stop the worker
+        stop_worker = object()
+
         def new_thread_intermediary_on_message(ws, data):
-            def run(*args):
-                on_message(data)
-            threading.Thread(target=run).start()
+            messages.put(data)
+
+        def on_message_worker():
+            while True:
+                data = messages.get()
+                if data is stop_worker:
+                    return
+                try:
+                    on_message(data)
+                except Exception as e:
+                    on_error(e)
 
         def intermediary_on_error(ws, error):
             on_error(error)
@@ -193,61 +237,76 @@ class MarketDataWebSocketClient:
         def intermediary_on_close(ws, close_status_code, close_msg):
             on_close(close_status_code, close_msg)
 
-            if reconnect:
-                if self.__nro_reconnect_retries == MAX_WS_RECONNECT_RETRIES:
-                    print(f"### Fail retriyng reconnect")
-                    return
-                self.__nro_reconnect_retries += 1
-                print(
-                    f"### Reconnecting.... Attempts: {self.__nro_reconnect_retries}/{MAX_WS_RECONNECT_RETRIES}")
-                self.run(on_open, on_message, on_error, on_close, reconnect)
+        def run_forever_with_reconnect():
+            try:
+                while True:
+                    self.ws.run_forever(**run_forever_conf)
+
+                    if not reconnect or self.__closed:
+                        return
+                    if self.__nro_reconnect_retries == MAX_WS_RECONNECT_RETRIES:
+                        print(f"### Fail retriyng reconnect")
+                        return
+                    self.__nro_reconnect_retries += 1
+                    print(
+                        f"### Reconnecting.... Attempts: {self.__nro_reconnect_retries}/{MAX_WS_RECONNECT_RETRIES}")
+                    self.__headers["Sec-WebSocket-Protocol"] = self.__authenticator.token
+            finally:
+                messages.put(stop_worker)
 
         if spawn_thread:
-            print('on_message callback function running on a new thread')
+            print('on_message callback function running on a dedicated worker thread')
+            threading.Thread(target=on_message_worker, daemon=True).start()
             on_message_callback = new_thread_intermediary_on_message
         else:
             on_message_callback = intermediary_on_message
 
+        self.__headers["Sec-WebSocket-Protocol"] = self.__authenticator.token
         self.ws = websocket.WebSocketApp(
             url=self.url,
             on_open=intermediary_on_open,
             on_message=on_message_callback,
             on_error=intermediary_on_error,
             on_close=intermediary_on_close,
-            header={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.54 Safari/537.36",
-                "Sec-WebSocket-Protocol": self.__authenticator.token,
-            }
+            header=self.__headers
         )
 
-        ssl_conf = {} if self.ssl else {"sslopt": {"cert_reqs": ssl.CERT_NONE}}
-        wst = threading.Thread(target=self.ws.run_forever, kwargs=ssl_conf)
+        run_forever_conf = {"sslopt": get_sslopt(self.ssl), "skip_utf8_validation": self.skip_utf8_validation}
+        self.__closed = False
+        wst = threading.Thread(target=run_forever_with_reconnect)
         wst.daemon = True
         wst.start()
 
-        while True:
-            if self.ws.sock is not None and self.ws.sock.connected:
-                break
-            pass
+        # The runner thread gives up after MAX_WS_RECONNECT_RETRIES (or at once without reconnect): don't wait on it forever
+        while not connected.wait(0.1):
+            if not wst.is_alive() and not connected.is_set():
+                raise FeedError("Could not connect to the websocket. Check your api_key and network connection.")
 
     def __send(self, data):
         """
         Class method to be used internally. Sends data to websocket.
+        Already serialized payloads (str or bytes) are sent as-is, without re-encoding.
         """
-        if not isinstance(data, str):
+        if not isinstance(data, (str, bytes)):
             data = json.dumps(data)
-        print(f'Sending data: {data}')
+        logger.debug('Sending data: %s', data)
+        if self.binary_frames:
+            if isinstance(data, str):
+                data = data.encode()
+            return self.ws.send(data, opcode=websocket.ABNF.OPCODE_BINARY)
         return self.ws.send(data)
 
     def close(self):
         """
         Closes connection with websocket.
         """
+        self.__closed = True
         self.ws.close()
 
     def subscribe(self, list_instruments, n=None):
         """
         Subscribes a list of instruments.
+        Each call sends one websocket frame: prefer a single call with all instruments over one call per instrument.
 
         Parameters
         ----------
@@ -260,37 +319,56 @@ class MarketDataWebSocketClient:
         """
 
         if self.data_type == BOOKS and n is not None:
-            self.__send({'action': 'subscribe', 'params': {"tickers": list_instruments, "n": n}})
-            print(f'Socket subscribed the following instrument(s) with n = {n}: {list_instruments}')
+            self.__send(self._SUBSCRIBE_BOOKS_PREFIX + fast_json.dumps(list_instruments) + self._SUBSCRIBE_BOOKS_N + fast_json.dumps(n) + self._SUBSCRIBE_BOOKS_SUFFIX)
+            logger.debug('Socket subscribed the following instrument(s) with n = %s: %s', n, list_instruments)
         else:
-            self.__send({'action': 'subscribe', 'params': list_instruments})
-            print(f'Socket subscribed the following instrument(s): {list_instruments}')
+            self.__send(self._SUBSCRIBE_PREFIX + fast_json.dumps(list_instruments) + self._SUFFIX)
+            logger.debug('Socket subscribed the following instrument(s): %s', list_instruments)
 
 
+    def subscribe_many(self, list_instruments, max_params_per_frame=5000, n=None):
+        """
+        Subscribes a large list of instruments, packing up to max_params_per_frame instruments in each websocket frame.
+
+        Parameters
+        ----------
+        list_instruments: list
+            Field is required.
+        max_params_per_frame: int
+            Field is not required. Default: 5000.
+            Maximum number of instruments sent in a single frame.
+        n: int
+            Field is not required.
+            **For books data_type only.**
+            Maximum book level. It must be between 1 and 10.
+        """
+        for i in range(0, len(list_instruments), max_params_per_frame):
+            self.subscribe(list_instruments[i:i + max_params_per_frame], n=n)
+
     def unsubscribe(self, list_instruments):
         """
         Unsubscribes a list of instruments.
+        Each call sends one websocket frame: prefer a single call with all instruments over one call per instrument.
 
         Parameters
         ----------
         list_instruments: list
             Field is required.
         """
-        self.__send({'action': 'unsubscribe', 'params': list_instruments})
-        print(
-            f'Socket subscribed the following instrument(s): {list_instruments}')
+        self.__send(self._UNSUBSCRIBE_PREFIX + fast_json.dumps(list_instruments) + self._SUFFIX)
+        logger.debug('Socket unsubscribed the following instrument(s): %s', list_instruments)
 
     def subscribed_to(self):
         """
         Return client subscribed tickers.
         """
-        self.__send({'action': 'subscribed_to'})
+        self.__send(self._SUBSCRIBED_TO_MSG)
 
     def available_to_subscribe(self):
         """
         Return avaiable tickers to subscribe.
         """
-        self.__send({'action': 'available_to_subscribe'})
+        self.__send(self._AVAILABLE_TO_SUBSCRIBE_MSG)
 
     def notify_stoploss(self, instrument_params):
         """
@@ -315,13 +393,14 @@ class MarketDataWebSocketClient:
         """
         self.__send({'action': 'clear_stoploss'})
 
-    def get_last_event(self, ticker: str):
+    def get_last_event(self, ticker: Union[str, List[str]]):
         """
-        Get the last event for the provided ticker.
+        Get the last event for the provided ticker(s).
+        Pass a list to request several tickers in a single message.
 
         Parameters
         ----------
-        ticker: str
+        ticker: str or list
             Field is required.
         """
         self.__send({'action': 'get_last_event', 'params': ticker})
@@ -337,10 +416,8 @@ class MarketDataWebSocketClient:
         candle_type: str
             Field is required.
         """
-        self.__send(
-            {'action': 'subscribe', 'params': list_instruments, 'type': candle_type})
-        print(
-            f'Socket subscribed the following instrument(s): {list_instruments}')
+        self.__send(self._SUBSCRIBE_PREFIX + fast_json.dumps(list_instruments) + self._CANDLE_TYPE + fast_json.dumps(candle_type) + self._SUFFIX)
+        logger.debug('Socket subscribed the following instrument(s): %s', list_instruments)
 
     def candle_unsubscribe(self, list_instruments: list, candle_type: str):
         """
@@ -353,7 +430,5 @@ class MarketDataWebSocketClient:
         candle_type: str
             Field is required.
         """
-        self.__send({'action': 'unsubscribe',
-                    'params': list_instruments, 'type': candle_type})
-        print(
-            f'Socket unsubscribed the following instrument(s): {list_instruments}')
+        self.__send(self._UNSUBSCRIBE_PREFIX + fast_json.dumps(list_instruments) + self._CANDLE_TYPE + fast_json.dumps(candle_type) + self._SUFFIX)
+        logger.debug('Socket unsubscribed the following instrument(s): %s', list_instruments)
@@ -0,0 +1,31 @@
+import os
+import ssl
+
+_ssl_contexts = {}
+
+def _get_ssl_context(verify:bool):
+    if verify not in _ssl_contexts:
+        if verify:
+            context = ssl.create_default_context()
+            # Same CA bundle override websocket-client honours when it builds the context itself
+            cert_path = os.environ.get("WEBSOCKET_CLIENT_CA_BUNDLE")
+            if cert_path and os.path.isfile(cert_path):
+                context.load_verify_locations(cafile=cert_path)
+            elif cert_path and os.path.isdir(cert_path):
+                context.load_verify_locations(capath=cert_path)
+        else:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        if os.environ.get("SSLKEYLOGFILE"):
+            context.keylog_filename = os.environ["SSLKEYLOGFILE"]
+        _ssl_contexts[verify] = context
+    return _ssl_contexts[verify]
+
+def get_sslopt(verify:bool=True):
+    """
+    Returns websocket-client 'sslopt' options backed by a process-wide SSLContext.
+    The context (and its loaded CA certificates) is built once and shared by every connection and reconnection.
+    WEBSOCKET_CLIENT_CA_BUNDLE and SSLKEYLOGFILE are read when the context is built.
+    """
+    return {"context": _get_ssl_context(verify)}
@@ -1,7 +1,7 @@
-import json 
+from .. import fast_json
 
 def _on_message(message):
-    print(json.loads(message))
+    print(fast_json.loads(message))
 
 def _on_error(error):
     print(f'### Error: {error} ###')
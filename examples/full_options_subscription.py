@@ -2,8 +2,17 @@ import btgsolutions_dataservices as btg
 from time import sleep
 import json
 import math
+import itertools
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 API_KEY = "PUT_YOUR_API_KEY_HERE"
+# Maximum number of instruments sent in a single websocket frame, for both subscriptions and last event requests
+MAX_PARAMS_PER_FRAME = 5000
 
 tickers_under_control = []
 
@@ -16,13 +25,14 @@ class WSTradesPool():
     self.callback_fn = callback_fn
     self.ws_connection_map = {} # key: connection id | value: ws object
     self.ws_instrument_map = {} # key: connection id | value: slice of list of desired instruments
+    self.ticker_to_ws = {} # key: instrument | value: connection id
     self.__initialize_websockets()
 
   def __chunks(self, lst, n):
     """ Generate N chunks of equal size from list."""
     size_per_chunk = math.ceil(len(lst)/n)
-    for i in range(0, len(lst), size_per_chunk):
-        yield lst[i:i + size_per_chunk]
+    it = iter(lst)
+    return iter(lambda: list(itertools.islice(it, size_per_chunk)), [])
 
   def __initialize_websockets(self):
     for i in range(self.number_of_connections):
@@ -40,33 +50,32 @@ class WSTradesPool():
 
   def subscribe(self, list_of_instruments):
     for i, instrument_chunk in enumerate(self.__chunks(list_of_instruments, self.number_of_connections)):
-      self.ws_connection_map[i].subscribe(instrument_chunk)
-      if i in self.ws_instrument_map:
-        self.ws_instrument_map[i] += instrument_chunk
-      else:
-        self.ws_instrument_map[i] = instrument_chunk
+      self.ws_connection_map[i].subscribe_many(instrument_chunk, max_params_per_frame=MAX_PARAMS_PER_FRAME)
+      self.ws_instrument_map.setdefault(i, []).extend(instrument_chunk)
+      for ticker in instrument_chunk:
+        self.ticker_to_ws[ticker] = i
 
   def get_last_event(self, ticker):
     self.get_ws_that_controls_instrument(ticker).get_last_event(ticker)
 
   def get_last_event_all_tickers(self):
     for ws_id, instrument_chunk in self.ws_instrument_map.items():
-      for ticker in instrument_chunk:
-        self.ws_connection_map[ws_id].get_last_event(ticker)
+      for i in range(0, len(instrument_chunk), MAX_PARAMS_PER_FRAME):
+        self.ws_connection_map[ws_id].get_last_event(instrument_chunk[i:i + MAX_PARAMS_PER_FRAME])
 
   def get_ws_that_controls_instrument(self, ticker):
-    for ws_id, instrument_chunk in self.ws_instrument_map.items():
-      if ticker in instrument_chunk:
-        return self.ws_connection_map[ws_id]
+    ws_id = self.ticker_to_ws.get(ticker)
+    if ws_id is not None:
+      return self.ws_connection_map[ws_id]
 
 def handle_ws_trades_message(msg):
-  parsed_msg = json.loads(msg)
+  parsed_msg = json_loads(msg)
   event_type = parsed_msg["ev"]
 
   if event_type == "message":
     print(f"""{parsed_msg["status"]}: {parsed_msg["message"]}""")
   elif event_type == "available_to_subscribe":
-    tickers_under_control = parsed_msg["message"]
+    tickers_under_control[:] = parsed_msg["message"]
     ws_trades_pool.subscribe(tickers_under_control)
   elif event_type == "trade":
     print(f"Trade event: {parsed_msg}")
@@ -74,8 +83,8 @@ def handle_ws_trades_message(msg):
     raise Exception(f"Unhandled event type {event_type} coming from ws_trades.")
 
 def handle_ws_securities_message(msg):
-  new_security_symbol = json.loads(msg)["Symbol"]
-  tickers_under_control += [new_security_symbol]
+  new_security_symbol = json_loads(msg)["Symbol"]
+  tickers_under_control.append(new_security_symbol)
   ws_trades_pool.subscribe([new_security_symbol])
 
 # Receive trades
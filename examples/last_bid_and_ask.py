@@ -1,11 +1,26 @@
 import btgsolutions_dataservices as btg
+import gc
 import json
+import threading
 import traceback
 import pandas as pd
 from time import sleep
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 desired_tickers = ['ABEVM138', 'ABEVM141']
-last_bid_and_offer_by_ticker = {}
+wanted_tickers = frozenset(desired_tickers)
+# One dict per column (ticker -> price), updated in place on every message
+last_bid_by_ticker = {}
+last_ask_by_ticker = {}
+# Set whenever a price changes, so the table is only rendered when there is something new to show
+prices_updated = threading.Event()
+# Guards the dicts above: they are written by the websocket thread and read by the render loop
+prices_lock = threading.Lock()
 
 ws = btg.MarketDataWebSocketClient(
     api_key='YOUR_API_KEY_HERE',
@@ -17,37 +32,48 @@ ws = btg.MarketDataWebSocketClient(
 )
 
 
+def update_last_bid_and_ask(msg):
+    ticker = msg["symb"]
+    if ticker not in wanted_tickers:
+        return
+    bid = msg.get("bid")
+    offer = msg.get("offer")
+    bid_px = bid[0]["px"] if bid else None
+    ask_px = offer[0]["px"] if offer else None
+    with prices_lock:
+        # Deeper book levels also generate updates: skip those that leave the top of book unchanged
+        if ticker in last_bid_by_ticker and last_bid_by_ticker[ticker] == bid_px and last_ask_by_ticker[ticker] == ask_px:
+            return
+        last_bid_by_ticker[ticker] = bid_px
+        last_ask_by_ticker[ticker] = ask_px
+    prices_updated.set()
+
+
+def on_last_event(msg):
+    if msg["message"] is None:
+        return
+    update_last_bid_and_ask(msg["message"])
+
+
+def on_book(msg):
+    update_last_bid_and_ask(msg)
+
+
+# Handlers by event type. Events without a handler (e.g. "message", "trade") are ignored.
+# NOTE: Remove the "book" handler if you do not want your dictionary to be updated continuously in realtime
+MESSAGE_HANDLERS = {
+    "get_last_event": on_last_event,
+    "book": on_book,
+}
+
+
 def on_message(ws_msg):
-    msg = json.loads(ws_msg)
+    msg = json_loads(ws_msg)
 
     try:
-        if msg["ev"] == "message":
-            return
-        elif msg["ev"] == "get_last_event":
-            if msg['message'] is None:
-                return
-            msg = msg["message"]
-            msg_ticker = msg["symb"]
-            last_bid_and_offer_by_ticker[msg_ticker] = {
-                "bid": msg["bid"][0]["px"],
-                "ask": msg["offer"][0]["px"]
-            }
-            df = pd.DataFrame().from_dict(last_bid_and_offer_by_ticker).T
-            print(df)
-            return
-        elif msg["ev"] == "trade":
-            msg_ticker = msg["symb"]
-            return
-        elif msg["ev"] == "book":
-            # NOTE: Comment this "book" if clause if you do not want your dictionary to be updated continuously in realtime
-            msg_ticker = msg["symb"]
-            last_bid_and_offer_by_ticker[msg_ticker] = {
-                "bid": msg["bid"][0]["px"],
-                "ask": msg["offer"][0]["px"]
-            }
-            df = pd.DataFrame().from_dict(last_bid_and_offer_by_ticker).T
-            print(df)
-            return
+        handler = MESSAGE_HANDLERS.get(msg["ev"])
+        if handler is not None:
+            handler(msg)
     except Exception as e:
         print(msg)
         print(e)
@@ -57,8 +83,21 @@ def on_message(ws_msg):
 ws.run(on_message=on_message)
 sleep(2)
 
-for ticker in desired_tickers:
-    ws.get_last_event([ticker])
+ws.get_last_event(desired_tickers)
 
+# Startup objects (client, pandas, handlers) live for the whole run: move them out of the cyclic GC's
+# tracked set so collections triggered during message bursts only scan the short-lived objects
+gc.freeze()
+
+# The dataframe is rendered here, as soon as a change arrives (at most 4 times per second), instead of on every message
 while True:
-    sleep(10)
+    # Timed wait, so Ctrl+C can still interrupt the loop on Windows
+    if not prices_updated.wait(timeout=1.0):
+        continue
+    prices_updated.clear()
+    with prices_lock:
+        bids, asks = dict(last_bid_by_ticker), dict(last_ask_by_ticker)
+    df = pd.DataFrame({"bid": bids, "ask": asks})
+    print(df)
+    sleep(0.25)
+
@@ -30,5 +30,8 @@ setup(
     packages=find_packages(),
     url="https://github.com/BTG-Pactual-Solutions/btgsolutions-dataservices-python-client",
     install_requires=install_requires,
+    extras_require={
+        "fast": ["orjson>=3.9"],
+    },
     python_requires=">=3.9,<3.13",
 )
\ No newline at end of file